@@ -2,6 +2,13 @@ __version__ = "0.1.0-alpha3"  # evaluated in setup.py
 
 import sys
 from .fstr import fstr
+from .guard import Guard
+from .template_set import TemplateSet
 
 fstr.__version__ = __version__
+fstr.Guard = Guard
+fstr.TemplateSet = TemplateSet
+# keep submodules (e.g. fstr.__main__) importable once this module is replaced
+fstr.__path__ = __path__
+fstr.__spec__ = globals().get("__spec__")
 sys.modules[__name__] = fstr
@@ -0,0 +1,138 @@
+"""Command line interface - ``python -m fstr --help``."""
+
+import io
+import os
+import sys
+import json
+import time
+import argparse
+
+from .codegen import NATIVE_FSTRINGS, compile_module, find_templates
+from .stream import BUFFER_SIZE, BATCH_SIZE, guess_format, read_rows, render_rows
+
+
+def compile_command(args):
+    try:
+        source = compile_module(find_templates(args.templates), args.legacy)
+    except (SyntaxError, ValueError) as error:
+        sys.stderr.write("error: %s\n" % error)
+        return 1
+    if args.output == "-":
+        sys.stdout.write(source)
+    else:
+        with io.open(args.output, "w", encoding="utf-8") as f:
+            f.write(source)
+    return 0
+
+
+# unreadable files, invalid templates, or rows which are malformed or missing
+# variables
+_RENDER_ERRORS = (
+    IOError,
+    OSError,
+    SyntaxError,
+    NameError,
+    LookupError,
+    AttributeError,
+    TypeError,
+    ValueError,
+)
+
+
+def render_command(args):
+    kind = args.format or guess_format(args.input)
+    # with several workers JSON is decoded in parallel rather than up front
+    decode = json.loads if kind == "jsonl" and args.workers > 1 else None
+    rows = read_rows(args.input, kind, decode=decode is None)
+    options = dict(workers=args.workers, batch_size=args.batch_size, decode=decode)
+
+    start = time.time()
+    try:
+        with io.open(args.template, encoding="utf-8") as f:
+            template = f.read()
+        if template.endswith("\n"):
+            template = template[:-1]
+        if not os.path.isfile(args.input):
+            raise IOError("No input file at %r." % args.input)
+        if args.output == "-":
+            count = render_rows(template, rows, sys.stdout, **options)
+        else:
+            with io.open(
+                args.output, "w", encoding="utf-8", buffering=BUFFER_SIZE
+            ) as f:
+                count = render_rows(template, rows, f, **options)
+    except _RENDER_ERRORS as error:
+        sys.stderr.write("error: %s\n" % error)
+        return 1
+    elapsed = time.time() - start
+
+    rate = count / elapsed if elapsed else float("inf")
+    message = "rendered %d rows in %.3fs (%.0f rows/s)\n" % (count, elapsed, rate)
+    sys.stderr.write(message)
+    return 0
+
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError("%r is not a positive integer" % value)
+    return number
+
+
+def make_parser():
+    parser = argparse.ArgumentParser(prog="python -m fstr")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    compile_parser = commands.add_parser(
+        "compile", help="compile template files into an importable python module"
+    )
+    compile_parser.add_argument("templates", help="a template file or directory")
+    compile_parser.add_argument(
+        "-o", "--output", default="-", help="module to write (default: stdout)"
+    )
+    compile_parser.add_argument(
+        "--legacy",
+        action="store_true",
+        default=not NATIVE_FSTRINGS,
+        help="emit str.format calls instead of f-strings (for python<3.6)",
+    )
+    compile_parser.set_defaults(function=compile_command)
+
+    render_parser = commands.add_parser(
+        "render", help="render a template file once per row of a JSONL or CSV file"
+    )
+    render_parser.add_argument("template", help="a template file")
+    render_parser.add_argument("-i", "--input", required=True, help="rows to render")
+    render_parser.add_argument(
+        "-o", "--output", default="-", help="file to write (default: stdout)"
+    )
+    render_parser.add_argument(
+        "--format",
+        choices=["jsonl", "csv"],
+        help="input format (default: inferred from the file extension)",
+    )
+    render_parser.add_argument(
+        "--workers",
+        type=positive_int,
+        default=1,
+        help="number of processes to render with",
+    )
+    render_parser.add_argument(
+        "--batch-size",
+        type=positive_int,
+        default=BATCH_SIZE,
+        help="rows rendered at a time",
+    )
+    render_parser.set_defaults(function=render_command)
+
+    return parser
+
+
+def main(argv=None):
+    args = make_parser().parse_args(argv)
+    return args.function(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""Compile fstr templates ahead of time into a module of plain functions."""
+
+import io
+import os
+import re
+import sys
+import keyword
+
+from .utils import fstring_literal, split_template, referenced_names
+
+try:
+    import builtins
+except ImportError:  # pragma: no cover
+    import __builtin__ as builtins
+
+
+NATIVE_FSTRINGS = sys.version_info >= (3, 6)
+
+_BUILTIN_NAMES = frozenset(dir(builtins))
+
+# names which are parsed as constants in python 3 but not python 2
+_CONSTANTS = frozenset(["None", "True", "False"])
+
+# builtins are imported under an alias so templates named after them (e.g.
+# "list.txt") can't shadow the defaults of other templates' parameters
+_BUILTINS_ALIAS = "_builtins"
+
+_MODULE_HEADER = '''"""Generated by fstr - do not edit."""
+
+try:
+    import builtins as _builtins
+except ImportError:  # python 2
+    import __builtin__ as _builtins
+
+__all__ = [%s]
+
+
+'''
+
+
+def function_name(path):
+    """Turn a template's relative path into a valid function name."""
+    name = re.sub(r"\W", "_", os.path.splitext(path)[0])
+    if not name or name[0].isdigit() or keyword.iskeyword(name):
+        name = "_" + name
+    return name
+
+
+def compile_function(name, template, legacy=not NATIVE_FSTRINGS):
+    """Return the source of a function which renders ``template``.
+
+    The function takes one parameter per free name referenced by the template.
+    Names which are also builtins become keyword parameters that default to the
+    builtin, looked up through the ``_builtins`` module that :func:`compile_module`
+    imports. Unless ``legacy`` is true the body is a native f-string, otherwise it
+    calls ``str.format`` with positional arguments.
+    """
+    format_string, expressions = split_template(template)
+
+    parameters = set()
+    for expr in expressions:
+        for ref in referenced_names(expr):
+            if not keyword.iskeyword(ref) and ref not in _CONSTANTS:
+                parameters.add(ref)
+    builtin_parameters = parameters & _BUILTIN_NAMES
+    parameters = sorted(parameters - builtin_parameters)
+    parameters.extend(
+        "%s=_builtins.%s" % (ref, ref) for ref in sorted(builtin_parameters)
+    )
+
+    if legacy:
+        arguments = ", ".join("(%s)" % e for e in expressions)
+        body = "return %r.format(%s)" % (format_string, arguments)
+    else:
+        body = "return f%s" % fstring_literal(template)
+
+    return "def %s(%s):\n    %s\n" % (name, ", ".join(parameters), body)
+
+
+def compile_module(templates, legacy=not NATIVE_FSTRINGS):
+    """Return the source of a module defining one function per template.
+
+    Parameters:
+        templates:
+            A mapping of function names to template strings.
+        legacy:
+            Whether to emit ``str.format`` calls instead of native f-strings.
+    """
+    if _BUILTINS_ALIAS in templates:
+        raise ValueError("The template name %r is reserved." % _BUILTINS_ALIAS)
+    functions = []
+    for name, template in sorted(templates.items()):
+        try:
+            functions.append(compile_function(name, template, legacy))
+        except SyntaxError as error:
+            info = (name, error.lineno, error.offset, error.text)
+            raise SyntaxError("%s (in template %r)" % (error.msg, name), info)
+    source = _MODULE_HEADER % ", ".join(repr(name) for name in sorted(templates))
+    source += "\n\n".join(functions)
+    if legacy or NATIVE_FSTRINGS:
+        compile(source, "<fstr>", "exec")
+    return source
+
+
+def find_templates(path):
+    """Map function names to the contents of the template file(s) at ``path``.
+
+    Hidden files and directories (whose names start with a dot) are skipped.
+    """
+    if os.path.isfile(path):
+        paths = [os.path.basename(path)]
+        path = os.path.dirname(path)
+    elif os.path.isdir(path):
+        paths = []
+        for directory, dirnames, filenames in os.walk(path):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            for filename in filenames:
+                if not filename.startswith("."):
+                    full = os.path.join(directory, filename)
+                    paths.append(os.path.relpath(full, path))
+    else:
+        raise ValueError("No template file or directory at %r." % path)
+
+    templates = {}
+    for relpath in sorted(paths):
+        name = function_name(relpath)
+        if name in templates:
+            msg = "Templates %r share the function name %r." % (relpath, name)
+            raise ValueError(msg)
+        with io.open(os.path.join(path, relpath), encoding="utf-8") as f:
+            templates[name] = f.read()
+    return templates
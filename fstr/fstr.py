@@ -1,7 +1,14 @@
 import sys
 import inspect
 
-from .utils import split_format_language, expr_starts_and_stops, raise_syntax_error
+from .profiling import Profile
+from .utils import (
+    split_format_language,
+    expr_starts_and_stops,
+    raise_syntax_error,
+    fstring_literal,
+    compile_expressions,
+)
 
 
 class fstr(str):
@@ -34,31 +41,20 @@ class fstr(str):
         parameters = dict(frame.f_globals, **frame.f_locals)
         return self.format(**parameters)
 
+    def profile(self, rows):
+        """Time each field of this template when rendered with every row in ``rows``.
+
+        Each row is a mapping of keyword arguments as would be passed to ``format``.
+        Returns a :class:`~fstr.profiling.Profile` whose ``fields`` hold the call
+        count, total and mean time, and output size of each ``{...}`` field.
+        """
+        return Profile(self, self.__context).run(rows)
+
     if sys.version_info >= (3, 6):  # noqa: C901
 
         def __init__(self, template, **context):
             self.__context = context
-            template = repr(template)
-            if r"\'" in template:
-                template = template.replace(r"\'", "'")
-                if '"""' in template:
-                    # this is only possible if backslashed were used.
-                    raise SyntaxError("f-string expression cannot contain a backslash.")
-                expression = '"""%s"""' % template[1:-1]
-            elif r"\"" in template:
-                template = template.replace(r"\"", '"')
-                if "'''" in template:
-                    # this is only possible if backslashed were used.
-                    raise SyntaxError("f-string expression cannot contain a backslash.")
-                expression = "'''%s'''" % template[1:-1]
-            elif r"\n" in template:
-                if "'''" in template:
-                    expression = '"""%s"""' % template[1:-1]
-                else:
-                    expression = "'''%s'''" % template[1:-1]
-                expression = expression.replace(r"\n", "\n")
-            else:
-                expression = template
+            expression = fstring_literal(template)
             self.__expression = expression[1:]
             self.__code = compile("f%s" % expression, "<fstr>", "eval")
 
@@ -116,10 +112,7 @@ class fstr(str):
 
             self.__template_parts = template_parts
             self.__template_fstrs = template_fstrs
-            # form expressions into a tuple that can be evaluated once
-            tuple_expression_items = ["(\n   %s\n)," % e for e in expressions]
-            tuple_expression = "(\n%s\n)" % "\n".join(tuple_expression_items)
-            self.__code = compile(tuple_expression, "<fstr>", "eval")
+            self.__code = compile_expressions(expressions)
 
         def format(self, **context):
             template = ""
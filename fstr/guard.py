@@ -0,0 +1,363 @@
+"""Bound the cost of rendering untrusted templates."""
+
+import re
+import ast
+import sys
+import time
+import string
+import numbers
+import operator
+
+from .fstr import fstr
+from .utils import split_template
+
+_OPCODE_EVENTS = sys.version_info >= (3, 7)
+
+if sys.version_info >= (3, 8):
+    _LITERALS = {ast.Constant: "value"}
+else:  # pragma: no cover
+    _LITERALS = {ast.Num: "n", ast.Str: "s"}
+    if hasattr(ast, "Bytes"):
+        _LITERALS[ast.Bytes] = "s"
+
+_SEQUENCES = (type(u""), bytes, tuple, list)
+
+_BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Pow: operator.pow,
+    ast.LShift: operator.lshift,
+    ast.Mod: operator.mod,
+}
+
+# methods of literal strings whose result size depends on their arguments
+_SIZED_METHODS = frozenset(["format", "ljust", "rjust", "center", "zfill"])
+
+_PERCENT_SPEC = re.compile(r"%(?:\([^)]*\))?[#0 +\-]*(\*|\d+)?(?:\.(\*|\d+))?")
+
+_UNARY_OPERATORS = {ast.UAdd: operator.pos, ast.USub: operator.neg}
+
+_UNKNOWN = object()
+
+_formatter = string.Formatter()
+
+
+class LimitExceeded(Exception):
+    """Base class for errors raised when a guarded template exceeds a limit."""
+
+
+class ExpressionTooComplex(LimitExceeded):
+    """A template's expressions are too large or deeply nested to accept."""
+
+
+class OutputTooLong(LimitExceeded):
+    """A template rendered (or would render) more characters than allowed."""
+
+
+class RenderTimeout(LimitExceeded):
+    """A template took longer to render than allowed."""
+
+
+class TooManyInstructions(LimitExceeded):
+    """A template executed more bytecode instructions than allowed."""
+
+
+class Guard(object):
+    """Limits imposed on templates which may come from untrusted sources.
+
+    Every limit is optional. Limits on expressions are checked by :meth:`compile`
+    while the rest are checked each time the returned template is formatted.
+
+    Parameters:
+        max_output:
+            The greatest number of characters a render may produce. When the
+            template is compiled, literal widths or precisions in its format
+            specifiers (e.g. ``{x:>10000000}``) that are larger than this are
+            rejected. So are literal-only arithmetic (``'x' * 10**9``), ``%``
+            formatting, and ``format``, ``ljust``, ``rjust``, ``center`` or
+            ``zfill`` calls on literal strings. Any other output (e.g.
+            ``{'x' * n}``) is measured only after it has been built, so this
+            does not stop it from being allocated.
+        max_time:
+            The greatest number of seconds a render may take.
+        max_instructions:
+            The greatest number of bytecode instructions (lines before Python 3.7)
+            a render may execute, including those of Python functions it calls.
+        max_nodes:
+            The greatest number of syntax tree nodes across all expressions.
+        max_depth:
+            The greatest depth of any one expression's syntax tree.
+
+    Time and instruction limits are enforced with :func:`sys.settrace` so they
+    cannot interrupt a single long-running call into C code.
+
+    Examples:
+        >>> guard = fstr.Guard(max_output=100, max_time=0.01, max_depth=10)
+        >>> hello = guard.compile("Hello {to.title()}!")
+        >>> hello.format(to="world")
+        'Hello World!'
+    """
+
+    def __init__(
+        self,
+        max_output=None,
+        max_time=None,
+        max_instructions=None,
+        max_nodes=None,
+        max_depth=None,
+    ):
+        self.max_output = max_output
+        self.max_time = max_time
+        self.max_instructions = max_instructions
+        self.max_nodes = max_nodes
+        self.max_depth = max_depth
+
+    def compile(self, template, **context):
+        """Check ``template`` against this guard's limits and compile it.
+
+        Raises:
+            SyntaxError: if the template is invalid.
+            ExpressionTooComplex: if the template's expressions exceed a limit.
+        """
+        try:
+            compiled = fstr(template, **context)
+        except RuntimeError:  # RecursionError from the compiler
+            raise ExpressionTooComplex("Template is nested too deeply to compile.")
+        self.check(template)
+        return GuardedTemplate(compiled, self)
+
+    def check(self, template):
+        """Raise :class:`ExpressionTooComplex` if ``template`` exceeds a limit."""
+        try:
+            format_string, expressions = split_template(template)
+            trees = [ast.parse("(\n%s\n)" % expr, mode="eval") for expr in expressions]
+        except RuntimeError:  # RecursionError from the parser
+            raise ExpressionTooComplex("Template is nested too deeply to parse.")
+
+        if self.max_output is not None:
+            for number in _format_spec_numbers(format_string):
+                if number > self.max_output:
+                    msg = "Format specifier would pad output beyond %s characters."
+                    raise ExpressionTooComplex(msg % self.max_output)
+
+        nodes = 0
+        for expr, tree in zip(expressions, trees):
+            nodes += sum(1 for _ in ast.walk(tree))
+            if self.max_nodes is not None and nodes > self.max_nodes:
+                msg = "Template has more than %s expression nodes." % self.max_nodes
+                raise ExpressionTooComplex(msg)
+            if self.max_depth is not None and _depth(tree) > self.max_depth:
+                msg = "Expression %r is nested more than %s levels deep."
+                raise ExpressionTooComplex(msg % (expr, self.max_depth))
+
+        # only fold once the cheaper limits have bounded the size of the trees
+        if self.max_output is not None:
+            for tree in trees:
+                _fold(tree, self.max_output)
+
+    def render(self, template, context):
+        """Format an :class:`fstr` with keyword arguments while enforcing limits."""
+        if self.max_time is None and self.max_instructions is None:
+            result = template.format(**context)
+        else:
+            result = self._traced(template.format, context)
+        if self.max_output is not None and len(result) > self.max_output:
+            msg = "Rendered %s characters but the limit is %s."
+            raise OutputTooLong(msg % (len(result), self.max_output))
+        return result
+
+    def _traced(self, function, kwargs):
+        deadline = None if self.max_time is None else time.time() + self.max_time
+        budget = self.max_instructions
+        counted = "opcode" if _OPCODE_EVENTS else "line"
+        state = {"count": 0, "error": None}
+
+        def trace(frame, event, arg):
+            if event == "call" and budget is not None and _OPCODE_EVENTS:
+                frame.f_trace_opcodes = True
+            elif event == counted and budget is not None:
+                state["count"] += 1
+                if state["count"] > budget:
+                    msg = "Executed more than %s instructions." % budget
+                    state["error"] = TooManyInstructions(msg)
+            if deadline is not None and time.time() > deadline:
+                msg = "Took longer than %s seconds." % self.max_time
+                state["error"] = RenderTimeout(msg)
+            if state["error"] is not None:
+                raise state["error"]
+            return trace
+
+        previous = sys.gettrace()
+        sys.settrace(trace)
+        try:
+            result = function(**kwargs)
+        finally:
+            sys.settrace(previous)
+        if state["error"] is not None:
+            # the traced code swallowed the error
+            raise state["error"]
+        return result
+
+
+class GuardedTemplate(object):
+    """A compiled template whose rendering is bounded by a :class:`Guard`."""
+
+    def __init__(self, template, guard):
+        self.template = template
+        self.guard = guard
+
+    def format(self, **context):
+        return self.guard.render(self.template, context)
+
+    def __repr__(self):
+        return "%s(%r)" % (type(self).__name__, self.template)
+
+
+def _depth(tree):
+    deepest = 0
+    stack = [(tree, 1)]
+    while stack:
+        node, depth = stack.pop()
+        deepest = max(deepest, depth)
+        stack.extend((child, depth + 1) for child in ast.iter_child_nodes(node))
+    return deepest
+
+
+def _format_spec_numbers(format_string):
+    """Yield every literal number (e.g. width or precision) in a format's specifiers."""
+    for _, field, spec, _ in _formatter.parse(format_string):
+        if field is not None and spec:
+            literal = "".join(text for text, _, _, _ in _formatter.parse(spec))
+            for digits in re.findall(r"\d+", literal):
+                yield int(digits)
+            # specifiers of fields nested inside this specifier
+            for number in _format_spec_numbers(spec):
+                yield number
+
+
+def _fold(tree, limit):
+    """Evaluate literal-only sub-expressions, refusing results larger than ``limit``.
+
+    Every node is folded once, children before parents, so that the cost grows
+    linearly with the size of the tree and deep trees can't exhaust the stack.
+    """
+    values = {}
+    stack = [(tree, False)]
+    while stack:
+        node, visited = stack.pop()
+        if visited:
+            values[node] = _fold_node(node, values, limit)
+        else:
+            stack.append((node, True))
+            stack.extend((child, False) for child in ast.iter_child_nodes(node))
+
+
+def _fold_node(node, values, limit):
+    """Fold one node given the folded values of its children."""
+    for literal, attr in _LITERALS.items():
+        if isinstance(node, literal):
+            return getattr(node, attr)
+    if isinstance(node, (ast.Tuple, ast.List)):
+        items = [values[item] for item in node.elts]
+        if _UNKNOWN in items:
+            return _UNKNOWN
+        return tuple(items) if isinstance(node, ast.Tuple) else items
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPERATORS:
+        operand = values[node.operand]
+        if isinstance(operand, numbers.Number):
+            return _UNARY_OPERATORS[type(node.op)](operand)
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+        left, right = values[node.left], values[node.right]
+        if left is _UNKNOWN or right is _UNKNOWN:
+            return _UNKNOWN
+        _check_size(_size(node.op, left, right), limit)
+        try:
+            return _BINARY_OPERATORS[type(node.op)](left, right)
+        except Exception:
+            return _UNKNOWN
+    if (
+        isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Attribute)
+        and node.func.attr in _SIZED_METHODS
+        and isinstance(values[node.func.value], type(u""))
+        and all(keyword.arg is not None for keyword in node.keywords)
+    ):
+        text = values[node.func.value]
+        args = [values[arg] for arg in node.args]
+        kwargs = dict((k.arg, values[k.value]) for k in node.keywords)
+        if _UNKNOWN in args or _UNKNOWN in kwargs.values():
+            return _UNKNOWN
+        method = node.func.attr
+        if method == "format":
+            size = _str_format_size(text, args + list(kwargs.values()))
+        else:
+            widths = [a for a in args if isinstance(a, numbers.Integral)]
+            size = max([len(text)] + widths)
+        _check_size(size, limit)
+        try:
+            return getattr(text, method)(*args, **kwargs)
+        except Exception:
+            return _UNKNOWN
+    return _UNKNOWN
+
+
+def _check_size(size, limit):
+    if size > limit:
+        msg = "Constant expression would produce more than %s characters." % limit
+        raise ExpressionTooComplex(msg)
+
+
+def _size(op, left, right):
+    """Estimate the length of ``left <op> right`` without computing it."""
+    if isinstance(op, ast.Mod) and isinstance(left, type(u"")):
+        return _percent_format_size(left, right)
+    if isinstance(op, ast.Mult):
+        if isinstance(left, _SEQUENCES) and isinstance(right, numbers.Integral):
+            return len(left) * right
+        if isinstance(right, _SEQUENCES) and isinstance(left, numbers.Integral):
+            return len(right) * left
+    if isinstance(left, numbers.Integral) and isinstance(right, numbers.Integral):
+        left_bits = abs(int(left)).bit_length()
+        right_bits = abs(int(right)).bit_length()
+        if isinstance(op, ast.Pow):
+            bits = left_bits * right if right > 0 else 0
+        elif isinstance(op, ast.LShift):
+            bits = left_bits + right
+        else:
+            bits = left_bits + right_bits
+        return bits * 0.302  # decimal digits per bit
+    if isinstance(left, _SEQUENCES) and isinstance(right, _SEQUENCES):
+        return len(left) + len(right)
+    return 0
+
+
+def _percent_format_size(text, args):
+    """Bound the length of ``text % args``."""
+    args = args if isinstance(args, tuple) else (args,)
+    size = len(text) + sum(len(a) for a in args if isinstance(a, _SEQUENCES))
+    for width, precision in _PERCENT_SPEC.findall(text):
+        for number in (width, precision):
+            if number == "*":
+                integers = [a for a in args if isinstance(a, numbers.Integral)]
+                size += sum(abs(int(a)) for a in integers)
+            elif number:
+                size += int(number)
+    return size
+
+
+def _str_format_size(text, args):
+    """Bound the length of ``text.format(*args)``."""
+    size = len(text) + sum(len(a) for a in args if isinstance(a, _SEQUENCES))
+    try:
+        size += sum(_format_spec_numbers(text))
+        nested = any(
+            spec and "{" in spec for _, _, spec, _ in _formatter.parse(text)
+        )
+    except ValueError:
+        return 0  # str.format would fail rather than allocate
+    if nested:
+        # widths may be given by the arguments
+        integers = [a for a in args if isinstance(a, numbers.Integral)]
+        size += sum(abs(int(a)) for a in integers)
+    return size
@@ -0,0 +1,105 @@
+"""Measure how much each field of a template contributes to rendering it."""
+
+import time
+
+from .utils import expr_starts_and_stops
+
+try:
+    timer = time.perf_counter
+except AttributeError:  # pragma: no cover
+    timer = time.time
+
+
+class FieldProfile(object):
+    """Timing statistics for one ``{...}`` field of a template.
+
+    Attributes:
+        offset: The index of the field's opening brace in the template.
+        source: The field as written in the template (including braces).
+        calls: The number of times the field was rendered.
+        total_time: Seconds spent rendering the field.
+        output_size: Total length of the field's rendered output.
+    """
+
+    def __init__(self, offset, source):
+        self.offset = offset
+        self.source = source
+        self.calls = 0
+        self.total_time = 0.0
+        self.output_size = 0
+
+    @property
+    def mean_time(self):
+        return self.total_time / self.calls if self.calls else 0.0
+
+    def as_dict(self):
+        return {
+            "offset": self.offset,
+            "source": self.source,
+            "calls": self.calls,
+            "total_time": self.total_time,
+            "mean_time": self.mean_time,
+            "output_size": self.output_size,
+        }
+
+    def __repr__(self):
+        return "%s(%r, offset=%s)" % (type(self).__name__, self.source, self.offset)
+
+
+class Profile(object):
+    """Render each field of a template separately, timing every one.
+
+    Fields are compiled on their own so that this never affects the code object
+    used by the template's regular ``format`` method. Use :meth:`fstr.profile`
+    rather than constructing this directly.
+    """
+
+    def __init__(self, template, context):
+        self.fields = []
+        self._formatters = []
+        for start, stop in expr_starts_and_stops(template):
+            source = template[start - 1 : stop + 1]
+            self.fields.append(FieldProfile(start - 1, source))
+            self._formatters.append(type(template)(source, **context).format)
+
+    def run(self, rows):
+        """Render every field once for each mapping of keyword arguments in ``rows``."""
+        measured = list(zip(self.fields, self._formatters))
+        for row in rows:
+            for field, formatter in measured:
+                start = timer()
+                output = formatter(**row)
+                field.total_time += timer() - start
+                field.calls += 1
+                field.output_size += len(output)
+        return self
+
+    def as_dict(self):
+        """Map each field's offset to its statistics."""
+        return {field.offset: field.as_dict() for field in self.fields}
+
+    def table(self, sort="total_time"):
+        """Format the statistics as a plain text table, slowest fields first."""
+        header = ("offset", "calls", "total (s)", "mean (s)", "output", "field")
+        rows = [header]
+        fields = sorted(self.fields, key=lambda f: getattr(f, sort), reverse=True)
+        for f in fields:
+            rows.append(
+                (
+                    str(f.offset),
+                    str(f.calls),
+                    "%.6f" % f.total_time,
+                    "%.3g" % f.mean_time,
+                    str(f.output_size),
+                    f.source.replace("\n", " "),
+                )
+            )
+        widths = [max(len(row[i]) for row in rows) for i in range(len(header) - 1)]
+        lines = []
+        for row in rows:
+            cells = [cell.rjust(width) for cell, width in zip(row, widths)]
+            lines.append("  ".join(cells + [row[-1]]))
+        return "\n".join(lines)
+
+    def __str__(self):
+        return self.table()
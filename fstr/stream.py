@@ -0,0 +1,124 @@
+"""Render a template over every row of a JSONL or CSV file."""
+
+import io
+import csv
+import json
+import itertools
+import multiprocessing
+
+from .fstr import fstr
+
+BUFFER_SIZE = 1 << 20
+BATCH_SIZE = 1000
+
+
+def guess_format(path):
+    """Infer whether a file holds JSONL or CSV rows from its extension."""
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+def read_rows(path, kind=None, decode=True):
+    """Yield each row of a JSONL or CSV file as a dictionary.
+
+    The format is inferred from the file extension unless given explicitly. If
+    ``decode`` is false, JSONL rows are yielded as undecoded lines so that the
+    work of parsing them can be handed to :func:`render_rows`.
+    """
+    if kind is None:
+        kind = guess_format(path)
+    with io.open(path, encoding="utf-8", newline="", buffering=BUFFER_SIZE) as f:
+        if kind == "csv":
+            for row in csv.DictReader(f):
+                yield row
+        elif kind == "jsonl":
+            for line in f:
+                if line.strip():
+                    yield json.loads(line) if decode else line
+        else:
+            raise ValueError("Unknown input format %r." % kind)
+
+
+def batches(rows, size=BATCH_SIZE):
+    """Group an iterable of rows into lists of at most ``size`` rows."""
+    if size < 1:
+        raise ValueError("Batch size must be at least 1, not %r." % size)
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, size))
+        if not batch:
+            break
+        yield batch
+
+
+def render_rows(
+    template, rows, output, workers=1, batch_size=BATCH_SIZE, end="\n", decode=None
+):
+    """Write ``template`` rendered against each row to ``output``.
+
+    Parameters:
+        template:
+            The source of the template. Each row's values are passed to it as
+            keyword arguments.
+        rows:
+            An iterable of dictionaries.
+        output:
+            A writable text file.
+        workers:
+            The number of processes to render with. Output order always follows
+            the order of ``rows``.
+        batch_size:
+            The number of rows rendered and written at a time.
+        end:
+            The string written after every rendered row.
+        decode:
+            A function applied to each row before rendering. It runs in the
+            worker processes, which is useful for parsing raw input lines.
+
+    Returns:
+        The number of rows rendered.
+
+    Raises:
+        SyntaxError: if the template is invalid.
+        ValueError: if ``workers`` or ``batch_size`` is less than 1.
+    """
+    if workers < 1:
+        raise ValueError("Number of workers must be at least 1, not %r." % workers)
+    if batch_size < 1:
+        raise ValueError("Batch size must be at least 1, not %r." % batch_size)
+    # compile up front so an invalid template fails here rather than in workers
+    render = fstr(template).format
+    count = 0
+    if workers > 1:
+        pool = multiprocessing.Pool(workers, _init_worker, (template, end, decode))
+        try:
+            for size, text in pool.imap(_render_batch, batches(rows, batch_size)):
+                output.write(text)
+                count += size
+        finally:
+            pool.terminate()
+    else:
+        for batch in batches(rows, batch_size):
+            size, text = _render(render, end, decode, batch)
+            output.write(text)
+            count += size
+    return count
+
+
+def _render(render, end, decode, batch):
+    if decode is not None:
+        batch = [decode(row) for row in batch]
+    return len(batch), "".join([render(**row) + end for row in batch])
+
+
+# per-process state of pool workers
+_worker_state = {}
+
+
+def _init_worker(template, end, decode):
+    # the compiled template can't be pickled so each process builds its own
+    _worker_state.update(render=fstr(template).format, end=end, decode=decode)
+
+
+def _render_batch(batch):
+    state = _worker_state
+    return _render(state["render"], state["end"], state["decode"], batch)
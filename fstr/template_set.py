@@ -0,0 +1,54 @@
+"""Render several templates at once, evaluating shared expressions once."""
+
+from .utils import split_template, compile_expressions
+
+
+class TemplateSet(object):
+    """Render a bundle of related templates against the same keyword arguments.
+
+    All the templates' expressions are compiled into one code object in which
+    each distinct expression appears once. Formatting evaluates that code a
+    single time and fills every template in from the shared results, so an
+    expression like ``{user.name}`` costs the same whether it is used by one
+    template or all of them.
+
+    Parameters:
+        templates:
+            A mapping of names to template strings (or :class:`fstr` objects,
+            whose own context is not used).
+        context:
+            Variables that are referenced in the templates' inner expressions. See
+            :class:`fstr` for how these interact with keyword arguments.
+
+    Examples:
+        >>> notification = fstr.TemplateSet({
+        ...     "subject": "Hi {user.title()}",
+        ...     "body": "{user.title()}, your total is {total:.2f}",
+        ... })
+        >>> notification.format(user="ann", total=3)
+        {'subject': 'Hi Ann', 'body': 'Ann, your total is 3.00'}
+    """
+
+    def __init__(self, templates, **context):
+        self.__context = context
+        self.__templates = dict(templates)
+
+        expressions = []
+        indices = {}
+        self.__formatters = []
+        for name, template in templates.items():
+            format_string, _ = split_template(template, expressions, indices)
+            self.__formatters.append((name, format_string.format))
+        self.__code = compile_expressions(expressions)
+
+    def format(self, **context):
+        """Return a dictionary mapping each template's name to its rendered text."""
+        values = eval(self.__code, self.__context, context)
+        return {name: render(*values) for name, render in self.__formatters}
+
+    def render_many(self, contexts):
+        """Format the templates once for each mapping of keyword arguments."""
+        return [self.format(**context) for context in contexts]
+
+    def __repr__(self):
+        return "%s(%r)" % (type(self).__name__, self.__templates)
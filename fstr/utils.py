@@ -1,3 +1,7 @@
+import ast
+import sys
+
+
 def split_format_language(string, full_template):
     depths = {"{}": 0, "[]": 0, "()": 0}
 
@@ -108,3 +112,177 @@ def expr_starts_and_stops(string):
 def raise_syntax_error(template, message, offset=1):
     info = ("fstr", 1, offset, template)
     raise SyntaxError(message, info)
+
+
+def fstring_literal(template):
+    """Return a string literal which evaluates like ``template`` when prefixed by f."""
+    # convert subclasses (e.g. fstr) whose repr is not a plain string literal
+    template = repr(type(u"")(template))
+    if r"\'" in template:
+        template = template.replace(r"\'", "'")
+        if '"""' in template:
+            # this is only possible if backslashed were used.
+            raise SyntaxError("f-string expression cannot contain a backslash.")
+        return '"""%s"""' % template[1:-1]
+    elif r"\"" in template:
+        template = template.replace(r"\"", '"')
+        if "'''" in template:
+            # this is only possible if backslashed were used.
+            raise SyntaxError("f-string expression cannot contain a backslash.")
+        return "'''%s'''" % template[1:-1]
+    elif r"\n" in template:
+        if "'''" in template:
+            expression = '"""%s"""' % template[1:-1]
+        else:
+            expression = "'''%s'''" % template[1:-1]
+        return expression.replace(r"\n", "\n")
+    else:
+        return template
+
+
+def to_format_string(template, intern):
+    """Translate an f-string template into a positional ``str.format`` template.
+
+    Each expression is passed to ``intern`` in evaluation order and replaced by
+    the positional index it returns. Expressions inside format specifiers become
+    nested replacement fields and self-documenting fields (``{x=}``) are expanded
+    into their text followed by the value.
+    """
+    parts = []
+    last = 0
+    for start, stop in expr_starts_and_stops(template):
+        parts.append(template[last : start - 1])
+        expr, format_lang = split_format_language(template[start:stop], template)
+        if "\\" in expr:
+            msg = "Backslash not allowed in expression."
+            raise_syntax_error(template, msg, start)
+        conversion = format_lang.split(":", 1)[0]
+        if conversion and conversion not in ("!s", "!r", "!a"):
+            msg = "Invalid conversion character in f-string."
+            raise_syntax_error(template, msg, start)
+        if _is_self_documenting(expr):
+            parts.append(expr.replace("{", "{{").replace("}", "}}"))
+            expr = expr.rstrip()[:-1]
+            if not format_lang:
+                format_lang = "!r"
+        if not expr.strip():
+            raise_syntax_error(template, "Empty expresion not allowed.", start)
+        index = intern(expr.strip())
+        if "{" in format_lang:
+            format_lang = to_format_string(format_lang, intern)
+        parts.append("{%s%s}" % (index, format_lang))
+        last = stop + 1
+    parts.append(template[last:])
+    return "".join(parts)
+
+
+def _is_self_documenting(expr):
+    expr = expr.rstrip()
+    return expr.endswith("=") and expr[-2:-1] not in ("=", "!", "<", ">")
+
+
+def split_template(template, expressions=None, indices=None):
+    """Split an f-string template into a positional format string and expressions.
+
+    Parameters:
+        template:
+            The template to split.
+        expressions:
+            A list the template's expressions are appended to. Pass the same list
+            for several templates to have them refer to one shared sequence.
+        indices:
+            A dictionary mapping expressions to their positions in ``expressions``.
+            If given, an expression seen before reuses its earlier position rather
+            than being appended again.
+
+    Returns:
+        The ``str.format`` template and the list of expressions it refers to.
+
+    Raises:
+        SyntaxError: if the template is invalid.
+    """
+    if sys.version_info >= (3, 6):
+        # validate the template exactly as fstr would compile it
+        compile("f%s" % fstring_literal(template), "<fstr>", "eval")
+    if expressions is None:
+        expressions = []
+
+    def intern(expr):
+        if indices is None:
+            expressions.append(expr)
+            return len(expressions) - 1
+        if expr not in indices:
+            indices[expr] = len(expressions)
+            expressions.append(expr)
+        return indices[expr]
+
+    return to_format_string(template, intern), expressions
+
+
+def compile_expressions(expressions):
+    """Compile expressions into code which evaluates to a tuple of their values."""
+    tuple_expression_items = ["(\n   %s\n)," % e for e in expressions]
+    tuple_expression = "(\n%s\n)" % "\n".join(tuple_expression_items)
+    return compile(tuple_expression, "<fstr>", "eval")
+
+
+def referenced_names(expression):
+    """Return the names an expression reads from its enclosing scope."""
+    names = []
+    tree = ast.parse("(\n%s\n)" % expression, mode="eval")
+    _collect_free_names(tree, set(), names)
+    return names
+
+
+_COMPREHENSIONS = tuple(
+    getattr(ast, name)
+    for name in ("ListComp", "SetComp", "DictComp", "GeneratorExp")
+    if hasattr(ast, name)
+)
+
+
+def _collect_free_names(node, bound, names):
+    if isinstance(node, ast.Name):
+        if not isinstance(node.ctx, ast.Load):
+            bound.add(node.id)
+        elif node.id not in bound and node.id not in names:
+            names.append(node.id)
+    elif isinstance(node, ast.Lambda):
+        # defaults are evaluated in the enclosing scope, the body in its own
+        defaults = node.args.defaults + getattr(node.args, "kw_defaults", [])
+        for default in defaults:
+            if default is not None:
+                _collect_free_names(default, bound, names)
+        _collect_free_names(node.body, bound | _argument_names(node.args), names)
+    elif isinstance(node, _COMPREHENSIONS):
+        # only the first iterable is evaluated in the enclosing scope
+        inner = set(bound)
+        for index, generator in enumerate(node.generators):
+            _collect_free_names(generator.iter, inner if index else bound, names)
+            inner.update(
+                n.id for n in ast.walk(generator.target) if isinstance(n, ast.Name)
+            )
+            for condition in generator.ifs:
+                _collect_free_names(condition, inner, names)
+        if isinstance(node, ast.DictComp):
+            results = [node.key, node.value]
+        else:
+            results = [node.elt]
+        for result in results:
+            _collect_free_names(result, inner, names)
+    else:
+        for child in ast.iter_child_nodes(node):
+            _collect_free_names(child, bound, names)
+
+
+def _argument_names(arguments):
+    names = set()
+    parameters = arguments.args + getattr(arguments, "kwonlyargs", [])
+    parameters += getattr(arguments, "posonlyargs", [])
+    parameters += [arguments.vararg, arguments.kwarg]
+    for parameter in parameters:
+        if isinstance(parameter, ast.Name):  # python 2
+            names.add(parameter.id)
+        elif parameter is not None:
+            names.add(getattr(parameter, "arg", parameter))
+    return names
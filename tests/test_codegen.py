@@ -0,0 +1,114 @@
+import pytest
+
+import fstr
+from fstr.codegen import (
+    compile_function,
+    compile_module,
+    find_templates,
+    function_name,
+)
+from fstr.__main__ import main
+
+
+def load(source):
+    namespace = {}
+    exec(source, namespace)
+    return namespace
+
+
+@pytest.mark.parametrize("legacy", [True, False])
+def test_compile_function(legacy):
+    template = "{x} + {y!r:>5} = {x + y:{width}}"
+    function = load(compile_function("add", template, legacy))["add"]
+    expected = fstr(template).format(x=1, y=2, width=3)
+    assert function(x=1, y=2, width=3) == expected
+
+
+@pytest.mark.parametrize("legacy", [True, False])
+def test_parameters_exclude_bound_names(legacy):
+    template = "{len([i for i in items])} {(lambda z: z)(w)}"
+    source = compile_function("f", template, legacy)
+    assert source.startswith("def f(items, w, len=_builtins.len):")
+
+
+@pytest.mark.parametrize("legacy", [True, False])
+def test_builtin_names_are_parameters(legacy):
+    template = "Order {id} of type {type}: {total:.2f}"
+    source = compile_function("a", template, legacy)
+    assert source.startswith("def a(total, id=_builtins.id, type=_builtins.type):")
+    function = load(compile_module({"a": template}, legacy))["a"]
+    assert function(id=1, type="book", total=2) == "Order 1 of type book: 2.00"
+    assert load(compile_module({"b": "{len(x)}"}, legacy))["b"](x=[1]) == "1"
+
+
+@pytest.mark.parametrize("legacy", [True, False])
+def test_templates_named_after_builtins(legacy):
+    namespace = load(compile_module({"len": "{x}", "z": "{len(y)}"}, legacy))
+    assert namespace["z"](y=[1, 2]) == "2"
+    assert namespace["len"](x=1) == "1"
+
+
+def test_reserved_template_name():
+    with pytest.raises(ValueError):
+        compile_module({"_builtins": "{x}"})
+
+
+@pytest.mark.parametrize("legacy", [True, False])
+def test_names_shadowed_in_inner_scopes_are_parameters(legacy):
+    template = "{i + sum(i for i in y)} {(lambda j, k=k: j + k)(j)} {[a for a in a]}"
+    source = compile_function("f", template, legacy)
+    assert source.startswith("def f(a, i, j, k, y, sum=_builtins.sum):")
+    function = load(compile_module({"f": template}, legacy))["f"]
+    assert function(a=[1], i=1, j=2, k=3, y=[4]) == "5 5 [1]"
+
+
+@pytest.mark.parametrize("legacy", [True, False])
+def test_self_documenting_expressions(legacy):
+    function = load(compile_function("f", "{x=} {x = :>3}", legacy))["f"]
+    assert function(x="v") == "x='v' x =   v"
+
+
+def test_compile_module():
+    namespace = load(compile_module({"a": "{{{x}}}", "b": "b\n"}))
+    assert namespace["__all__"] == ["a", "b"]
+    assert namespace["a"](x=1) == "{1}"
+    assert namespace["b"]() == "b\n"
+
+
+def test_bad_template_raises_at_build_time():
+    with pytest.raises(SyntaxError):
+        compile_module({"bad": "{x"})
+
+
+def test_function_name():
+    assert function_name("emails/welcome.txt") == "emails_welcome"
+    assert function_name("1st.txt") == "_1st"
+    assert function_name("class") == "_class"
+
+
+def test_compile_command(tmpdir):
+    tmpdir.mkdir("templates").join("hello.txt").write("Hello {name}!")
+    output = tmpdir.join("rendered.py")
+    assert main(["compile", str(tmpdir.join("templates")), "-o", str(output)]) == 0
+    assert load(output.read())["hello"](name="world") == "Hello world!"
+
+
+def test_find_templates_skips_hidden_files(tmpdir):
+    tmpdir.join("a.txt").write("{x}")
+    tmpdir.join(".gitkeep").write("")
+    tmpdir.mkdir(".cache").join("b.txt").write("{y}")
+    assert find_templates(str(tmpdir)) == {"a": "{x}"}
+
+
+def test_compile_command_reports_missing_path(tmpdir, capsys):
+    output = tmpdir.join("rendered.py")
+    argv = ["compile", str(tmpdir.join("typo")), "-o", str(output)]
+    assert main(argv) == 1
+    assert "typo" in capsys.readouterr().err
+    assert not output.exists()
+
+
+def test_compile_command_reports_bad_template(tmpdir, capsys):
+    tmpdir.join("bad.txt").write("{x")
+    assert main(["compile", str(tmpdir)]) == 1
+    assert "bad" in capsys.readouterr().err
@@ -0,0 +1,138 @@
+import pytest
+
+import fstr
+from fstr.guard import (
+    LimitExceeded,
+    ExpressionTooComplex,
+    OutputTooLong,
+    RenderTimeout,
+    TooManyInstructions,
+)
+
+
+def test_guarded_format():
+    guard = fstr.Guard(max_output=100, max_time=1, max_instructions=1000)
+    template = guard.compile("{greeting}, {to.title()}!", greeting="Hello")
+    assert template.format(to="world") == "Hello, World!"
+
+
+def test_invalid_template():
+    with pytest.raises(SyntaxError):
+        fstr.Guard().compile("{x")
+
+
+_oversized_constants = [
+    "{'x' * 10**9}",
+    "{10**9 * [0]}",
+    "{2**10**10}",
+    "{1 << 10**9}",
+    "{'%0100000000d' % 1}",
+    "{'%*d' % (10**8, 1)}",
+    "{'{:>100000000}'.format(1)}",
+    "{'{:>{}}'.format(1, 10**8)}",
+    "{'x'.ljust(10**9)}",
+    "{'x'.zfill(10**9)}",
+    "{'ab'.center(600) * 2}",
+]
+
+
+@pytest.mark.parametrize("template", _oversized_constants)
+def test_oversized_constant(template):
+    with pytest.raises(ExpressionTooComplex):
+        fstr.Guard(max_output=1000).compile(template)
+
+
+_oversized_format_specs = [
+    "{'':>300000000}",
+    "{1.5:.5000}",
+    "{x:{y:10000}}",
+    "{x:{width}.{precision}} {'':10000}",
+    "{x!r:*^{1}5000}",
+]
+
+
+@pytest.mark.parametrize("template", _oversized_format_specs)
+def test_oversized_format_spec(template):
+    with pytest.raises(ExpressionTooComplex):
+        fstr.Guard(max_output=1000).compile(template)
+
+
+def test_small_format_spec_allowed():
+    guard = fstr.Guard(max_output=1000)
+    template = guard.compile("{x:>10} {x:{width}.{precision}} {x:0>5}")
+    assert template.format(x=1.25, width=5, precision=2) == "      1.25   1.2 01.25"
+
+
+def test_small_constant_allowed():
+    template = fstr.Guard(max_output=1000).compile("{'x' * 10**2}")
+    assert template.format() == "x" * 100
+
+    template = fstr.Guard(max_output=1000).compile(
+        "{'%05d%%' % 1} {'{:>4}'.format(x)} {'x'.ljust(3)}|"
+    )
+    assert template.format(x=1) == "00001%    1 x  |"
+
+
+def test_long_expression_is_checked_in_linear_time():
+    guard = fstr.Guard(max_output=1000)
+    template = guard.compile("{%s}" % "+".join(["x"] * 2000))
+    assert template.format(x=1) == "2000"
+    with pytest.raises(ExpressionTooComplex):
+        guard.compile("{%s + len('x' * 10**9)}" % "+".join(["1"] * 2000))
+
+
+def test_too_deeply_nested_to_compile():
+    with pytest.raises(ExpressionTooComplex):
+        fstr.Guard(max_output=1000).compile("{%s}" % "+".join(["x"] * 100000))
+
+
+def test_too_many_nodes():
+    guard = fstr.Guard(max_nodes=10)
+    guard.compile("{a + b}")
+    with pytest.raises(ExpressionTooComplex):
+        guard.compile("{a + b} {c + d} {e + f}")
+
+
+def test_too_deep():
+    guard = fstr.Guard(max_depth=6)
+    guard.compile("{[[1]]}")
+    with pytest.raises(ExpressionTooComplex):
+        guard.compile("{[[[[[[[[1]]]]]]]]}")
+
+
+def test_output_too_long():
+    template = fstr.Guard(max_output=10).compile("{'ab' * n}")
+    assert template.format(n=5) == "ab" * 5
+    with pytest.raises(OutputTooLong):
+        template.format(n=6)
+
+
+def test_render_timeout():
+    template = fstr.Guard(max_time=0.05).compile("{sum(i for i in range(10**8))}")
+    with pytest.raises(RenderTimeout):
+        template.format()
+
+
+def test_too_many_instructions():
+    template = fstr.Guard(max_instructions=1000).compile("{sum(i for i in range(n))}")
+    assert template.format(n=10) == "45"
+    with pytest.raises(TooManyInstructions):
+        template.format(n=10 ** 6)
+
+
+def test_swallowed_limit_is_reraised():
+    def swallow(function):
+        try:
+            return function()
+        except Exception:
+            return "swallowed"
+
+    guard = fstr.Guard(max_instructions=100)
+    template = guard.compile("{swallow(lambda: [i for i in range(10**4)])}")
+    with pytest.raises(LimitExceeded):
+        template.format(swallow=swallow)
+
+
+def test_compile_fstr_template():
+    template = fstr.Guard(max_output=100).compile(fstr("Hello {to}!"))
+    assert template.format(to="world") == "Hello world!"
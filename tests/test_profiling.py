@@ -0,0 +1,33 @@
+import fstr
+
+
+def test_profile_fields():
+    template = fstr("{{{x}}} {y:{width}} {x * 2}", width=4)
+    profile = template.profile([{"x": 1, "y": "a"}, {"x": 10, "y": "b"}])
+
+    assert [f.source for f in profile.fields] == ["{x}", "{y:{width}}", "{x * 2}"]
+    assert [f.offset for f in profile.fields] == [2, 8, 20]
+    for field in profile.fields:
+        assert template[field.offset :].startswith(field.source)
+        assert field.calls == 2
+        assert field.total_time >= 0
+        assert field.mean_time == field.total_time / 2
+    assert [f.output_size for f in profile.fields] == [3, 8, 3]
+
+
+def test_profile_export():
+    profile = fstr("a{x}b").profile([{"x": "xyz"}])
+    stats = profile.as_dict()
+    assert list(stats) == [1]
+    assert stats[1]["source"] == "{x}"
+    assert stats[1]["output_size"] == 3
+
+    lines = profile.table().splitlines()
+    assert lines[0].startswith("offset  calls")
+    assert lines[1].endswith("{x}")
+
+
+def test_profile_does_not_change_format():
+    template = fstr("{x}")
+    template.profile([{"x": 1}])
+    assert template.format(x=2) == "2"
@@ -0,0 +1,98 @@
+import io
+import json
+
+import pytest
+
+from fstr.stream import read_rows, render_rows
+from fstr.__main__ import main
+
+
+ROWS = [{"name": "n%d" % i, "total": i / 4.0} for i in range(25)]
+
+
+@pytest.fixture
+def jsonl(tmpdir):
+    path = tmpdir.join("rows.jsonl")
+    path.write("\n".join(json.dumps(row) for row in ROWS) + "\n\n")
+    return str(path)
+
+
+def test_read_rows(tmpdir, jsonl):
+    assert list(read_rows(jsonl)) == ROWS
+    assert list(read_rows(jsonl, decode=False))[0] == json.dumps(ROWS[0]) + "\n"
+
+    path = tmpdir.join("rows.csv")
+    path.write("name,total\na,1\nb,2\n")
+    assert list(read_rows(str(path))) == [
+        {"name": "a", "total": "1"},
+        {"name": "b", "total": "2"},
+    ]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_render_rows_keeps_order(workers):
+    output = io.StringIO()
+    count = render_rows(u"{name}={total}", ROWS, output, workers, batch_size=4)
+    assert count == len(ROWS)
+    expected = "".join("%s=%s\n" % (row["name"], row["total"]) for row in ROWS)
+    assert output.getvalue() == expected
+
+
+def test_render_rows_is_reentrant():
+    inner = io.StringIO()
+
+    def rows():
+        for i in range(3):
+            if i == 1:
+                render_rows(u"B{i}", [{"i": i}], inner)
+            yield {"i": i}
+
+    outer = io.StringIO()
+    render_rows(u"A{i}", rows(), outer, batch_size=1)
+    assert outer.getvalue() == "A0\nA1\nA2\n"
+    assert inner.getvalue() == "B1\n"
+
+
+@pytest.mark.parametrize("options", [{"batch_size": 0}, {"workers": 0}])
+def test_render_rows_rejects_non_positive_sizes(options):
+    with pytest.raises(ValueError):
+        render_rows(u"{name}", ROWS, io.StringIO(), **options)
+
+
+def test_render_rows_decode(jsonl):
+    output = io.StringIO()
+    rows = read_rows(jsonl, decode=False)
+    render_rows(u"{name}", rows, output, workers=2, decode=json.loads)
+    assert output.getvalue() == "".join(row["name"] + "\n" for row in ROWS)
+
+
+def test_render_command(tmpdir, jsonl, capsys):
+    tmpdir.join("template.txt").write("{name.upper()}\n")
+    output = tmpdir.join("out.txt")
+    argv = ["render", str(tmpdir.join("template.txt")), "-i", jsonl, "-o", str(output)]
+    assert main(argv + ["--workers", "2"]) == 0
+    assert output.read() == "".join(row["name"].upper() + "\n" for row in ROWS)
+    assert "rendered 25 rows" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("template", ["Hi {name", "Hi {missing}"])
+def test_render_command_reports_errors(tmpdir, jsonl, capsys, template):
+    tmpdir.join("template.txt").write(template)
+    argv = ["render", str(tmpdir.join("template.txt")), "-i", jsonl, "--workers", "2"]
+    assert main(argv) == 1
+    assert capsys.readouterr().err.startswith("error: ")
+
+
+@pytest.mark.parametrize("option", ["--batch-size", "--workers"])
+@pytest.mark.parametrize("value", ["0", "-1"])
+def test_render_command_rejects_non_positive_sizes(tmpdir, jsonl, option, value):
+    tmpdir.join("template.txt").write("{name}")
+    with pytest.raises(SystemExit):
+        main(["render", str(tmpdir.join("template.txt")), "-i", jsonl, option, value])
+
+
+def test_render_command_reports_missing_input(tmpdir, capsys):
+    tmpdir.join("template.txt").write("{name}")
+    argv = ["render", str(tmpdir.join("template.txt")), "-i", str(tmpdir.join("typo"))]
+    assert main(argv) == 1
+    assert capsys.readouterr().err.startswith("error: ")
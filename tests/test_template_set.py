@@ -0,0 +1,75 @@
+import pytest
+
+import fstr
+
+
+def test_format():
+    templates = fstr.TemplateSet(
+        {"subject": "Hi {name.title()}", "body": "{{{name.title()}}} owes {total:.2f}"},
+        name="ann",
+    )
+    assert templates.format(total=3) == {"subject": "Hi Ann", "body": "{Ann} owes 3.00"}
+
+
+def test_fstr_templates():
+    templates = fstr.TemplateSet({"a": fstr("Hi {name}"), "b": fstr("{name!r}")})
+    assert templates.format(name="ann") == {"a": "Hi ann", "b": "'ann'"}
+
+
+def test_shared_expressions_evaluated_once():
+    calls = []
+
+    def count(value):
+        calls.append(value)
+        return value
+
+    templates = fstr.TemplateSet(
+        {"a": "{count(x)} {count(y)!r}", "b": "{count(x):>3}", "c": "{ count(x) }"},
+        count=count,
+    )
+    assert templates.format(x=1, y="y") == {"a": "1 'y'", "b": "  1", "c": "1"}
+    assert calls == [1, "y"]
+
+
+@pytest.mark.parametrize(
+    "template",
+    [
+        "result: {value:{width}.{precision}}",
+        "result: {value:{width!r}.{precision}}",
+        "result: {value:{width:0}.{precision:1}}",
+        "result: {value:{ 1}{ 0:0}.{ precision:1}}",
+    ],
+)
+def test_matches_fstr(template):
+    context = {"width": 10, "precision": 4, "value": 12.34567}
+    assert fstr.TemplateSet({"t": template}).format(**context) == {
+        "t": fstr(template).format(**context)
+    }
+
+
+_self_documenting = [
+    ("{x=}", "x='v'"),
+    ("{ x = }", " x = 'v'"),
+    ("{x=!s}", "x=v"),
+    ("{x=:>3}", "x=  v"),
+    ("{x==x}", "True"),
+]
+
+
+@pytest.mark.parametrize("template, expected", _self_documenting)
+def test_self_documenting_expressions(template, expected):
+    assert fstr.TemplateSet({"t": template}).format(x="v") == {"t": expected}
+
+
+def test_render_many():
+    templates = fstr.TemplateSet({"double": "{x * 2}", "square": "{x ** 2}"})
+    assert templates.render_many([{"x": 2}, {"x": 3}]) == [
+        {"double": "4", "square": "4"},
+        {"double": "6", "square": "9"},
+    ]
+
+
+@pytest.mark.parametrize("template", ["{x", "}", "{x!ss}", "{x!}", "{ }"])
+def test_invalid_template(template):
+    with pytest.raises(SyntaxError):
+        fstr.TemplateSet({"ok": "{x}", "bad": template})